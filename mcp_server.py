@@ -4,14 +4,47 @@ Simple MCP Server for GitHub Repository Creation
 """
 
 import asyncio
+import base64
+import binascii
+import concurrent.futures
+import functools
+import importlib
+import importlib.util
+import io
 import json
 import logging
 import os
+import stat
 import sys
-from typing import Any, Dict, List
+import tempfile
+import threading
+import types
+from email.header import Header
+from email.utils import formataddr, getaddresses
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type, Union, cast
 
+import fastjsonschema
+import google_auth_httplib2
+import httplib2
 import httpx
 from dotenv import load_dotenv
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import Resource, build
+from googleapiclient.http import BatchHttpRequest, HttpRequest
+
+def _optional_import(name: str) -> Optional[types.ModuleType]:
+    """Import an optional accelerator module, or return None when it isn't installed"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+# orjson is optional, fall back to the stdlib json module
+orjson = _optional_import("orjson")
+# pysimdjson is optional, used for decoding when orjson is missing
+simdjson = _optional_import("simdjson")
+# uvloop is optional, fall back to the default event loop
+uvloop = _optional_import("uvloop")
 
 # Load environment variables from .env file
 load_dotenv()
@@ -25,208 +58,457 @@ GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 if not GITHUB_TOKEN:
     logger.error("GITHUB_TOKEN not found in environment variables. Please set it in your .env file or environment.")
     sys.exit(1)
-GITHUB_API_URL = "https://api.github.com/user/repos"
+GITHUB_API_URL = "https://api.github.com"
+
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]")
+GITHUB_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Google configuration - authorized user token shared by Calendar and Gmail
+TOKEN_PATH = os.getenv("GOOGLE_TOKEN_PATH", "./token.json")
+# Gmail rate-limits batch requests larger than 50 calls
+GMAIL_BATCH_SIZE = 50
+# Email bodies with more base64 data than this are decoded in a worker thread
+LARGE_BODY_SIZE = 64 * 1024
+
+# Line printed between items in list results
+RESULT_SEPARATOR = "─" * 50
+
+# Largest single MCP message accepted on stdin
+STDIN_LIMIT = 16 * 1024 * 1024
+# Most bytes taken from stdin per read
+READ_CHUNK_SIZE = 64 * 1024
+# Maximum number of MCP requests handled at the same time
+MAX_CONCURRENT_REQUESTS = 32
+# Worker threads for blocking Google API calls and large body decodes
+MAX_WORKER_THREADS = 8
+# Methods answered directly by the read loop, they never wait on I/O
+INLINE_METHODS = frozenset({"initialize", "tools/list"})
+
+# Static tools/list payload, built once at import. Treat as read-only.
+_TOOLS_LIST_RESULT = {
+    "tools": [
+        {
+            "name": "create_github_repository",
+            "description": "Create a new GitHub repository",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "type": "string",
+                        "minLength": 1,
+                        "description": "Name of the repository to create"
+                    },
+                    "private": {
+                        "type": "boolean",
+                        "description": "Whether the repository should be private",
+                        "default": False
+                    },
+                    "description": {
+                        "type": "string",
+                        "description": "Description of the repository"
+                    },
+                    "auto_init": {
+                        "type": "boolean",
+                        "description": "Initialize repository with README",
+                        "default": True
+                    }
+                },
+                "required": ["name"]
+            }
+        },
+        {
+            "name": "delete_github_repository",
+            "description": "Delete a GitHub repository",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "type": "string",
+                        "minLength": 1,
+                        "description": "Name of the repository to delete"
+                    }
+                },
+                "required": ["name"]
+            }
+        },
+        {
+            "name": "list_calendar_events",
+            "description": "List upcoming Google Calendar events",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "maxResults": {
+                        "type": "integer",
+                        "description": "Maximum number of events to return",
+                        "default": 10
+                    }
+                }
+            }
+        },
+        {
+            "name": "create_calendar_events",
+            "description": "Create a Google Calendar event",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "summary": {"type": "string", "description": "Event title"},
+                    "start": {"type": "object", "description": "Start time object (dateTime or date)"},
+                    "end": {"type": "object", "description": "End time object (dateTime or date)"}
+                },
+                "required": ["summary", "start", "end"]
+            }
+        },
+        {
+            "name": "update_calendar_events",
+            "description": "Update a Google Calendar event",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "eventId": {"type": "string", "minLength": 1, "description": "ID of the event to update"},
+                    "summary": {"type": "string", "description": "Event title"},
+                    "start": {"type": "object", "description": "Start time object (dateTime or date)"},
+                    "end": {"type": "object", "description": "End time object (dateTime or date)"}
+                },
+                "required": ["eventId"]
+            }
+        },
+        {
+            "name": "delete_calendar_events",
+            "description": "Delete a Google Calendar event",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "eventId": {"type": "string", "minLength": 1, "description": "ID of the event to delete"}
+                },
+                "required": ["eventId"]
+            }
+        },
+        {
+            "name": "list_emails",
+            "description": "List Gmail messages using Google Calendar authentication",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "maxResults": {
+                        "type": "integer",
+                        "description": "Maximum number of emails to return",
+                        "default": 10
+                    },
+                    "query": {
+                        "type": "string",
+                        "description": "Gmail search query (optional)"
+                    }
+                }
+            }
+        },
+        {
+            "name": "send_email",
+            "description": "Send an email using Gmail API",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "to": {"type": "string", "minLength": 1, "pattern": "^[^\\r\\n]*$", "description": "Recipient email address"},
+                    "subject": {"type": "string", "minLength": 1, "pattern": "^[^\\r\\n]*$", "description": "Email subject"},
+                    "body": {"type": "string", "minLength": 1, "description": "Email body content"}
+                },
+                "required": ["to", "subject", "body"]
+            }
+        },
+        {
+            "name": "read_email",
+            "description": "Read a specific email by ID",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "emailId": {"type": "string", "minLength": 1, "description": "ID of the email to read"}
+                },
+                "required": ["emailId"]
+            }
+        },
+        {
+            "name": "delete_email",
+            "description": "Delete a Gmail message",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "emailId": {"type": "string", "minLength": 1, "description": "ID of the email to delete"}
+                },
+                "required": ["emailId"]
+            }
+        }
+    ]
+}
+
+# Compiled argument validators, one per tool
+_VALIDATORS = {
+    tool["name"]: fastjsonschema.compile(tool["inputSchema"])
+    for tool in _TOOLS_LIST_RESULT["tools"]
+}
+
+def _ok(msg_id: Any, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a JSON-RPC success response"""
+    return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+def _error(msg_id: Any, code: int, message: str) -> Dict[str, Any]:
+    """Build a JSON-RPC error response"""
+    return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": message}}
+
+if orjson is not None:
+    _loads = orjson.loads
+    _JSONDecodeError: Tuple[Type[Exception], ...] = (orjson.JSONDecodeError,)
+elif simdjson is not None:
+    # Messages are handled concurrently, so decode to plain objects instead of
+    # lazy proxies that a reused simdjson.Parser would invalidate
+    _loads = simdjson.loads
+    # simdjson reports some errors, like DEPTH_ERROR, as RuntimeError
+    _JSONDecodeError = (ValueError, RuntimeError)
+else:
+    def _loads(data: Any) -> Any:
+        # json.loads doesn't take memoryviews
+        return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+    # Invalid UTF-8 raises UnicodeDecodeError and deep nesting RecursionError
+    _JSONDecodeError = (ValueError, RecursionError)
+
+if orjson is not None:
+    _dumps = orjson.dumps
+else:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+@functools.lru_cache(maxsize=1)
+def _tools_list_json() -> bytes:
+    """Return _TOOLS_LIST_RESULT serialized, encoding it on first use"""
+    return _dumps(_TOOLS_LIST_RESULT)
+
+def _tools_list_response(msg_id: Any) -> bytes:
+    """Build a framed tools/list response around the cached payload"""
+    return b'{"jsonrpc":"2.0","id":' + _dumps(msg_id) + b',"result":' + _tools_list_json() + b'}\n'
+
+def _text(text: str, is_error: bool = False) -> Dict[str, Any]:
+    """Build a tool result holding a single text item"""
+    result: Dict[str, Any] = {"content": [{"type": "text", "text": text}]}
+    if is_error:
+        result["isError"] = True
+    return result
+
+# Static framing around the text of errors raised outside the tool handlers
+_PARSE_ERROR_PREFIX = b'{"jsonrpc":"2.0","id":null,"error":{"code":-32700,"message":"Parse error: '
+_INTERNAL_ERROR_INFIX = b',"error":{"code":-32603,"message":"Internal error: '
+_ERROR_SUFFIX = b'"}}\n'
+
+def _parse_error_frame(text: str) -> bytes:
+    """Build a framed parse-error response"""
+    # Encoding a str yields a quoted JSON string, keep only the escaped contents
+    return _PARSE_ERROR_PREFIX + _dumps(text)[1:-1] + _ERROR_SUFFIX
+
+def _internal_error_frame(msg_id: Any, text: str) -> bytes:
+    """Build a framed internal-error response"""
+    return b'{"jsonrpc":"2.0","id":' + _dumps(msg_id) + _INTERNAL_ERROR_INFIX + _dumps(text)[1:-1] + _ERROR_SUFFIX
+
+_OVERSIZED_MESSAGE_FRAME = _parse_error_frame(f"message exceeds {STDIN_LIMIT} bytes")
+
+def _header_map(headers: List[Dict[str, str]]) -> Dict[str, str]:
+    """Index Gmail message headers by lowercased name"""
+    return {h['name'].lower(): h['value'] for h in headers}
+
+def _find_text_data(payload: Dict[str, Any]) -> Optional[str]:
+    """Return the base64url data of the first inline text/plain part, searching nested multiparts"""
+    if payload.get('mimeType') == 'text/plain' and 'data' in payload.get('body', {}):
+        return payload['body']['data']
+    for part in payload.get('parts', ()):
+        data = _find_text_data(part)
+        if data:
+            return data
+    return None
+
+_URLSAFE_TO_STD = bytes.maketrans(b"-_", b"+/")
+
+def _decode_body(data: str) -> str:
+    """Decode base64url message body data to text"""
+    return binascii.a2b_base64(data.encode('ascii').translate(_URLSAFE_TO_STD)).decode('utf-8', 'replace')
+
+def _plain_text_message(to: str, subject: str, body: str) -> bytes:
+    """Serialize a text/plain email without going through the email package generator"""
+    if not to.isascii():
+        to = ", ".join(formataddr(address, charset="utf-8") for address in getaddresses([to]))
+    if not subject.isascii():
+        subject = Header(subject, "utf-8").encode()
+    if body.isascii():
+        encoding = "7bit"
+    else:
+        # Like MIMEText, base64 keeps non-ASCII bodies within SMTP line limits
+        encoding = "base64"
+        body = base64.encodebytes(body.encode("utf-8")).decode("ascii")
+    return (
+        f"To: {to}\n"
+        f"Subject: {subject}\n"
+        "MIME-Version: 1.0\n"
+        "Content-Type: text/plain; charset=\"utf-8\"\n"
+        f"Content-Transfer-Encoding: {encoding}\n"
+        "\n"
+        f"{body}"
+    ).encode("ascii")
+
+def _save_token(data: str) -> None:
+    """Replace TOKEN_PATH with data"""
+    # Write a temp file next to the token and swap it in, so a crash or a
+    # concurrent refresh never leaves a truncated token.json behind
+    f = tempfile.NamedTemporaryFile("w", dir=os.path.dirname(os.path.abspath(TOKEN_PATH)),
+                                    prefix=".token-", suffix=".json", delete=False)
+    try:
+        with f:
+            f.write(data)
+        os.replace(f.name, TOKEN_PATH)
+    except BaseException:
+        os.unlink(f.name)
+        raise
 
 class MCPServer:
-    def __init__(self):
-        self.server_name = "github-repo-creator"
-        self.server_version = "1.0.0"
+    __slots__ = (
+        "server_name", "server_version", "_dispatch", "_tools",
+        "_http", "_gh_login", "_gh_login_lock",
+        "_creds", "_creds_lock", "_calendar", "_gmail", "_thread_local",
+    )
+
+    def __init__(self) -> None:
+        self.server_name: str = "github-repo-creator"
+        self.server_version: str = "1.0.0"
+        # Dispatch tables bound to this instance, so lookups return ready-to-call methods
+        self._dispatch: Dict[str, Callable[..., Awaitable[Dict[str, Any]]]] = {
+            method: types.MethodType(handler, self) for method, handler in _METHOD_DISPATCH.items()
+        }
+        self._tools: Dict[str, Callable[..., Awaitable[Dict[str, Any]]]] = {
+            name: types.MethodType(handler, self) for name, handler in _TOOL_DISPATCH.items()
+        }
+        # Shared GitHub client, created on first use and kept alive between calls
+        self._http: Optional[httpx.AsyncClient] = None
+        # Login of the token owner, fetched once from GET /user
+        self._gh_login: Optional[str] = None
+        self._gh_login_lock = asyncio.Lock()
+        # Google credentials, loaded once at startup and refreshed in memory
+        self._creds: Optional[Credentials] = None
+        self._creds_lock = asyncio.Lock()
+        try:
+            self._creds = Credentials.from_authorized_user_file(TOKEN_PATH)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Google credentials not loaded from {TOKEN_PATH}: {e}")
+        # Google API services, built once on first use
+        self._calendar: Optional[Resource] = None
+        self._gmail: Optional[Resource] = None
+        # httplib2 is not thread-safe, so each worker thread gets its own transport
+        self._thread_local = threading.local()
+
+    async def _client(self) -> httpx.AsyncClient:
+        """Return the shared GitHub HTTP client, creating it on first use"""
+        # No await happens before the assignment, so concurrent callers can't race here
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=GITHUB_API_URL,
+                http2=GITHUB_HTTP2,
+                headers={
+                    "Authorization": f"token {GITHUB_TOKEN}",
+                    "Accept": "application/vnd.github+json"
+                },
+                # Keep every pooled connection alive so none are torn down between calls
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=20),
+                timeout=httpx.Timeout(10.0, connect=5.0)
+            )
+        return self._http
+
+    async def _github_login(self) -> str:
+        """Return the login of the authenticated GitHub user, fetching it once"""
+        if self._gh_login is not None:
+            return self._gh_login
+        async with self._gh_login_lock:
+            if self._gh_login is None:
+                client = await self._client()
+                response = await client.get("/user")
+                if response.status_code != 200:
+                    raise RuntimeError(f"Failed to get user info: {response.status_code}")
+                self._gh_login = response.json().get("login")
+        return self._gh_login
+
+    def _credentials(self) -> Credentials:
+        """Return the Google credentials, loading them from TOKEN_PATH if startup couldn't"""
+        if self._creds is None:
+            self._creds = Credentials.from_authorized_user_file(TOKEN_PATH)
+        return self._creds
+
+    def _calendar_service(self) -> Resource:
+        """Return the cached Google Calendar service"""
+        if self._calendar is None:
+            # Use the bundled discovery document instead of fetching it over HTTPS
+            self._calendar = build('calendar', 'v3', credentials=self._credentials(),
+                                   cache_discovery=False, static_discovery=True)
+        return self._calendar
+
+    def _gmail_service(self) -> Resource:
+        """Return the cached Gmail service"""
+        if self._gmail is None:
+            # Use the bundled discovery document instead of fetching it over HTTPS
+            self._gmail = build('gmail', 'v1', credentials=self._credentials(),
+                                cache_discovery=False, static_discovery=True)
+        return self._gmail
+
+    def _thread_http(self) -> google_auth_httplib2.AuthorizedHttp:
+        """Return an authorized HTTP transport owned by the current thread"""
+        http = getattr(self._thread_local, "http", None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self._credentials(), http=httplib2.Http())
+            self._thread_local.http = http
+        return http
+
+    def _refresh_credentials(self, creds: Credentials) -> None:
+        """Refresh the Google access token and save it back to TOKEN_PATH"""
+        creds.refresh(google_auth_httplib2.Request(httplib2.Http()))
+        try:
+            _save_token(creds.to_json())
+        except OSError as e:
+            # The refreshed token is already in memory, so the request can go ahead
+            logger.warning(f"Refreshed Google credentials not saved to {TOKEN_PATH}: {e}")
+
+    async def _execute(self, request: Union[HttpRequest, BatchHttpRequest]) -> Any:
+        """Run a blocking Google API request in a worker thread"""
+        creds = self._credentials()
+        if not creds.valid:
+            # Refresh once up front instead of letting every worker thread do it
+            async with self._creds_lock:
+                if not creds.valid:
+                    await asyncio.to_thread(self._refresh_credentials, creds)
+        return await asyncio.to_thread(lambda: request.execute(http=self._thread_http()))
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
         
     async def handle_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """Handle incoming MCP messages"""
         method = message.get("method")
         msg_id = message.get("id")
         
-        if method == "initialize":
-            return self.handle_initialize(message, msg_id)
-        elif method == "tools/list":
-            return self.handle_list_tools(msg_id)
-        elif method == "tools/call":
-            return await self.handle_call_tool(message, msg_id)
-        else:
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "error": {
-                    "code": -32601,
-                    "message": f"Method not found: {method}"
-                }
-            }
+        handler = self._dispatch.get(method) if isinstance(method, str) else None
+        if handler is None:
+            return _error(msg_id, -32601, f"Method not found: {method}")
+        return await handler(message, msg_id)
     
-    def handle_initialize(self, message: Dict[str, Any], msg_id: int) -> Dict[str, Any]:
+    async def handle_initialize(self, message: Dict[str, Any], msg_id: int) -> Dict[str, Any]:
         """Handle initialization request"""
-        return {
-            "jsonrpc": "2.0",
-            "id": msg_id,
-            "result": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {}
-                },
-                "serverInfo": {
-                    "name": self.server_name,
-                    "version": self.server_version
-                }
+        return _ok(msg_id, {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {
+                "tools": {}
+            },
+            "serverInfo": {
+                "name": self.server_name,
+                "version": self.server_version
             }
-        }
+        })
     
-    def handle_list_tools(self, msg_id: int) -> Dict[str, Any]:
+    async def handle_list_tools(self, message: Dict[str, Any], msg_id: int) -> Dict[str, Any]:
         """Handle tools/list request"""
-        return {
-            "jsonrpc": "2.0",
-            "id": msg_id,
-            "result": {
-                "tools": [
-                    {
-                        "name": "create_github_repository",
-                        "description": "Create a new GitHub repository",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "name": {
-                                    "type": "string",
-                                    "description": "Name of the repository to create"
-                                },
-                                "private": {
-                                    "type": "boolean",
-                                    "description": "Whether the repository should be private",
-                                    "default": False
-                                },
-                                "description": {
-                                    "type": "string",
-                                    "description": "Description of the repository"
-                                },
-                                "auto_init": {
-                                    "type": "boolean",
-                                    "description": "Initialize repository with README",
-                                    "default": True
-                                }
-                            },
-                            "required": ["name"]
-                        }
-                    },
-                    {
-                        "name": "delete_github_repository",
-                        "description": "Delete a GitHub repository",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "name": {
-                                    "type": "string",
-                                    "description": "Name of the repository to delete"
-                                }
-                            },
-                            "required": ["name"]
-                        }
-                    },
-                    {
-                        "name": "list_calendar_events",
-                        "description": "List upcoming Google Calendar events",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "maxResults": {
-                                    "type": "integer",
-                                    "description": "Maximum number of events to return",
-                                    "default": 10
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "name": "create_calendar_events",
-                        "description": "Create a Google Calendar event",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "summary": {"type": "string", "description": "Event title"},
-                                "start": {"type": "object", "description": "Start time object (dateTime or date)"},
-                                "end": {"type": "object", "description": "End time object (dateTime or date)"}
-                            },
-                            "required": ["summary", "start", "end"]
-                        }
-                    },
-                    {
-                        "name": "update_calendar_events",
-                        "description": "Update a Google Calendar event",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "eventId": {"type": "string", "description": "ID of the event to update"},
-                                "summary": {"type": "string", "description": "Event title"},
-                                "start": {"type": "object", "description": "Start time object (dateTime or date)"},
-                                "end": {"type": "object", "description": "End time object (dateTime or date)"}
-                            },
-                            "required": ["eventId"]
-                        }
-                    },
-                    {
-                        "name": "delete_calendar_events",
-                        "description": "Delete a Google Calendar event",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "eventId": {"type": "string", "description": "ID of the event to delete"}
-                            },
-                            "required": ["eventId"]
-                        }
-                    },
-                    {
-                        "name": "list_emails",
-                        "description": "List Gmail messages using Google Calendar authentication",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "maxResults": {
-                                    "type": "integer",
-                                    "description": "Maximum number of emails to return",
-                                    "default": 10
-                                },
-                                "query": {
-                                    "type": "string",
-                                    "description": "Gmail search query (optional)"
-                                }
-                            }
-                        }
-                    },
-                    {
-                        "name": "send_email",
-                        "description": "Send an email using Gmail API",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "to": {"type": "string", "description": "Recipient email address"},
-                                "subject": {"type": "string", "description": "Email subject"},
-                                "body": {"type": "string", "description": "Email body content"}
-                            },
-                            "required": ["to", "subject", "body"]
-                        }
-                    },
-                    {
-                        "name": "read_email",
-                        "description": "Read a specific email by ID",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "emailId": {"type": "string", "description": "ID of the email to read"}
-                            },
-                            "required": ["emailId"]
-                        }
-                    },
-                    {
-                        "name": "delete_email",
-                        "description": "Delete a Gmail message",
-                        "inputSchema": {
-                            "type": "object",
-                            "properties": {
-                                "emailId": {"type": "string", "description": "ID of the email to delete"}
-                            },
-                            "required": ["emailId"]
-                        }
-                    }
-                ]
-            }
-        }
+        return _ok(msg_id, _TOOLS_LIST_RESULT)
     
     async def handle_call_tool(self, message: Dict[str, Any], msg_id: int) -> Dict[str, Any]:
         """Handle tools/call request"""
@@ -234,106 +516,20 @@ class MCPServer:
         tool_name = params.get("name")
         arguments = params.get("arguments", {})
         
-        if tool_name == "create_github_repository":
-            result = await self.create_github_repository(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        if tool_name == "delete_github_repository":
-            result = await self.delete_github_repository(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        elif tool_name == "list_calendar_events":
-            result = await self.list_calendar_events(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        elif tool_name == "create_calendar_events":
-            result = await self.create_calendar_events(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        elif tool_name == "update_calendar_events":
-            result = await self.update_calendar_events(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        elif tool_name == "delete_calendar_events":
-            result = await self.delete_calendar_events(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        elif tool_name == "list_emails":
-            result = await self.list_emails(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        elif tool_name == "send_email":
-            result = await self.send_email(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        elif tool_name == "read_email":
-            result = await self.read_email(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        elif tool_name == "delete_email":
-            result = await self.delete_email(arguments)
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": result
-            }
-        else:
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "error": {
-                    "code": -32601,
-                    "message": f"Unknown tool: {tool_name}"
-                }
-            }
+        handler = self._tools.get(tool_name)
+        if handler is None:
+            return _error(msg_id, -32601, f"Unknown tool: {tool_name}")
+        try:
+            _VALIDATORS[tool_name](arguments)
+        except fastjsonschema.JsonSchemaException as e:
+            return _error(msg_id, -32602, f"Invalid arguments for {tool_name}: {e.message}")
+        result = await handler(arguments)
+        return _ok(msg_id, result)
     
     async def create_github_repository(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Create a GitHub repository"""
         try:
-            repo_name = arguments.get("name")
-            if not repo_name:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Error: Repository name is required"
-                        }
-                    ],
-                    "isError": True
-                }
-            
-            # Prepare GitHub API request
-            headers = {
-                "Authorization": f"token {GITHUB_TOKEN}",
-                "Accept": "application/vnd.github+json"
-            }
+            repo_name = arguments["name"]
             
             json_data = {
                 "name": repo_name,
@@ -345,137 +541,60 @@ class MCPServer:
                 json_data["description"] = arguments["description"]
             
             # Call GitHub API
-            async with httpx.AsyncClient() as client:
-                response = await client.post(GITHUB_API_URL, json=json_data, headers=headers)
+            client = await self._client()
+            response = await client.post("/user/repos", json=json_data)
             
             if response.status_code == 201:
                 repo_data = response.json()
                 repo_url = repo_data.get("html_url", "Unknown")
                 
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"✅ Successfully created GitHub repository '{repo_name}'!\n\nRepository URL: {repo_url}\nClone URL: {repo_data.get('clone_url', 'Unknown')}"
-                        }
-                    ]
-                }
+                return _text(f"✅ Successfully created GitHub repository '{repo_name}'!\n\nRepository URL: {repo_url}\nClone URL: {repo_data.get('clone_url', 'Unknown')}")
             else:
                 error_data = response.json()
                 error_message = error_data.get("message", "Unknown error")
                 
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"❌ Failed to create repository: {error_message} (Status: {response.status_code})"
-                        }
-                    ],
-                    "isError": True
-                }
+                return _text(f"❌ Failed to create repository: {error_message} (Status: {response.status_code})", is_error=True)
                 
         except Exception as e:
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"❌ Error creating repository: {str(e)}"
-                    }
-                ],
-                "isError": True
-            }
+            return _text(f"❌ Error creating repository: {str(e)}", is_error=True)
 
     async def delete_github_repository(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Delete a GitHub repository"""
         try:
-            repo_name = arguments.get("name")
-            if not repo_name:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": "Error: Repository name is required"
-                        }
-                    ],
-                    "isError": True
-                }
-            
-            # Prepare GitHub API request
-            headers = {
-                "Authorization": f"token {GITHUB_TOKEN}",
-                "Accept": "application/vnd.github+json"
-            }
+            repo_name = arguments["name"]
             
             # Get the username from the token
-            async with httpx.AsyncClient() as client:
-                # First, get user info to get the username
-                user_response = await client.get("https://api.github.com/user", headers=headers)
-                if user_response.status_code != 200:
-                    return {
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": f"❌ Failed to get user info: {user_response.status_code}"
-                            }
-                        ],
-                        "isError": True
-                    }
-                
-                user_data = user_response.json()
-                username = user_data.get("login")
-                
-                # Now delete the repository using the full path
-                delete_url = f"https://api.github.com/repos/{username}/{repo_name}"
-                response = await client.delete(delete_url, headers=headers)
+            try:
+                username = await self._github_login()
+            except RuntimeError as e:
+                return _text(f"❌ {str(e)}", is_error=True)
+            
+            # Now delete the repository using the full path
+            client = await self._client()
+            response = await client.delete(f"/repos/{username}/{repo_name}")
             
             if response.status_code == 204:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"✅ Successfully deleted GitHub repository '{repo_name}'"
-                        }
-                    ]
-                }
+                return _text(f"✅ Successfully deleted GitHub repository '{repo_name}'")
             else:
                 error_data = response.json()
                 error_message = error_data.get("message", "Unknown error")
                 
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"❌ Failed to delete repository: {error_message} (Status: {response.status_code})"
-                        }
-                    ],
-                    "isError": True
-                }
+                return _text(f"❌ Failed to delete repository: {error_message} (Status: {response.status_code})", is_error=True)
                 
         except Exception as e:
-            return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": f"❌ Error deleting repository: {str(e)}"
-                    }
-                ],
-                "isError": True
-            }
+            return _text(f"❌ Error deleting repository: {str(e)}", is_error=True)
 
     async def list_calendar_events(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """List upcoming Google Calendar events with IDs"""
-        from googleapiclient.discovery import build
-        from google.oauth2.credentials import Credentials
 
         max_results = arguments.get("maxResults", 10)
         try:
-            creds = Credentials.from_authorized_user_file('/Users/amanueltefera/Desktop/untitled folder 3/token.json')
-            service = build('calendar', 'v3', credentials=creds)
-            events_result = service.events().list(calendarId='primary', maxResults=max_results).execute()
+            service = self._calendar_service()
+            events_result = await self._execute(service.events().list(calendarId='primary', maxResults=max_results))
             events = events_result.get('items', [])
             
             if not events:
-                return {"content": [{"type": "text", "text": "No calendar events found."}]}
+                return _text("No calendar events found.")
             
             output = []
             for event in events:
@@ -491,259 +610,436 @@ class MCPServer:
                 else:
                     start_time = 'No start time'
                 
-                output.append(f"📅 {summary}\nStart: {start_time}\nID: {event_id}\n{'─' * 50}")
+                output.append(f"📅 {summary}\nStart: {start_time}\nID: {event_id}\n{RESULT_SEPARATOR}")
             
-            return {"content": [{"type": "text", "text": "\n".join(output)}]}
+            return _text("\n".join(output))
         except Exception as e:
-            return {"content": [{"type": "text", "text": f"Error: {str(e)}"}], "isError": True}
+            return _text(f"Error: {str(e)}", is_error=True)
     
     async def delete_calendar_events(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Delete a Google Calendar event"""
-        from googleapiclient.discovery import build
-        from google.oauth2.credentials import Credentials
-        
-        event_id = arguments.get("eventId")
-        if not event_id:
-            return {"content": [{"type": "text", "text": "Error: Event ID is required"}], "isError": True}
+        event_id = arguments["eventId"]
         
         try:
-            creds = Credentials.from_authorized_user_file('/Users/amanueltefera/Desktop/untitled folder 3/token.json')
-            service = build('calendar', 'v3', credentials=creds)
-            service.events().delete(calendarId='primary', eventId=event_id).execute()   
-            return {"content": [{"type": "text", "text": f"✅ Successfully deleted event: {event_id}"}]}
+            service = self._calendar_service()
+            await self._execute(service.events().delete(calendarId='primary', eventId=event_id))
+            return _text(f"✅ Successfully deleted event: {event_id}")
         except Exception as e:
-            return {"content": [{"type": "text", "text": f"❌ Error deleting event: {str(e)}"}], "isError": True}
+            return _text(f"❌ Error deleting event: {str(e)}", is_error=True)
 
     async def create_calendar_events(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Create a Google Calendar event"""
-        from googleapiclient.discovery import build
-        from google.oauth2.credentials import Credentials
-        
         try:
-            creds = Credentials.from_authorized_user_file('/Users/amanueltefera/Desktop/untitled folder 3/token.json')
-            service = build('calendar', 'v3', credentials=creds)
-            event = service.events().insert(calendarId='primary', body=arguments).execute() 
+            service = self._calendar_service()
+            event = await self._execute(service.events().insert(calendarId='primary', body=arguments)) 
             
             event_id = event.get('id', 'No ID')
             summary = event.get('summary', 'No Title')
             
-            return {"content": [{"type": "text", "text": f"✅ Successfully created event: {summary}\nEvent ID: {event_id}"}]}
+            return _text(f"✅ Successfully created event: {summary}\nEvent ID: {event_id}")
         except Exception as e:
-            return {"content": [{"type": "text", "text": f"❌ Error creating event: {str(e)}"}], "isError": True}
+            return _text(f"❌ Error creating event: {str(e)}", is_error=True)
         
     async def update_calendar_events(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Update a Google Calendar event"""
-        from googleapiclient.discovery import build
-        from google.oauth2.credentials import Credentials
-        
-        event_id = arguments.get("eventId")
-        if not event_id:
-            return {"content": [{"type": "text", "text": "Error: Event ID is required"}], "isError": True}  
+        event_id = arguments["eventId"]
         
         try:
-            creds = Credentials.from_authorized_user_file('/Users/amanueltefera/Desktop/untitled folder 3/token.json')
-            service = build('calendar', 'v3', credentials=creds)
-            event = service.events().update(calendarId='primary', eventId=event_id, body=arguments).execute()
-            return {"content": [{"type": "text", "text": f"✅ Successfully updated event: {event.get('summary', 'No Title')}"}]}    
+            service = self._calendar_service()
+            event = await self._execute(service.events().update(calendarId='primary', eventId=event_id, body=arguments))
+            return _text(f"✅ Successfully updated event: {event.get('summary', 'No Title')}")
         except Exception as e:
-            return {"content": [{"type": "text", "text": f"❌ Error updating event: {str(e)}"}], "isError": True}
+            return _text(f"❌ Error updating event: {str(e)}", is_error=True)
 
     async def list_emails(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """List Gmail messages using Google Calendar authentication"""
-        from googleapiclient.discovery import build
-        from google.oauth2.credentials import Credentials
-        import base64
-        import email
 
         max_results = arguments.get("maxResults", 10)
         query = arguments.get("query", "")
         
         try:
-            creds = Credentials.from_authorized_user_file('/Users/amanueltefera/Desktop/untitled folder 3/token.json')
-            service = build('gmail', 'v1', credentials=creds)
+            service = self._gmail_service()
             
             # List messages
             if query:
-                messages_result = service.users().messages().list(
+                messages_result = await self._execute(service.users().messages().list(
                     userId='me', 
                     maxResults=max_results,
                     q=query
-                ).execute()
+                ))
             else:
-                messages_result = service.users().messages().list(
+                messages_result = await self._execute(service.users().messages().list(
                     userId='me', 
                     maxResults=max_results
-                ).execute()
+                ))
             
             messages = messages_result.get('messages', [])
             
             if not messages:
-                return {"content": [{"type": "text", "text": "No emails found."}]}
+                return _text("No emails found.")
+            
+            # Fetch only the headers we need, batching the per-message requests
+            fetched = {}
+            
+            def collect(request_id: str, response: Dict[str, Any], exception: Optional[Exception]) -> None:
+                if exception is not None:
+                    raise exception
+                fetched[request_id] = response
+            
+            batches = []
+            for i in range(0, len(messages), GMAIL_BATCH_SIZE):
+                batch = service.new_batch_http_request(callback=collect)
+                for message in messages[i:i + GMAIL_BATCH_SIZE]:
+                    batch.add(service.users().messages().get(
+                        userId='me',
+                        id=message['id'],
+                        format='metadata',
+                        metadataHeaders=['Subject', 'From', 'Date']
+                    ), request_id=message['id'])
+                batches.append(self._execute(batch))
+            await asyncio.gather(*batches)
             
             output = []
             for message in messages:
-                msg = service.users().messages().get(userId='me', id=message['id']).execute()
+                msg = fetched[message['id']]
                 
                 # Extract headers
-                headers = msg['payload']['headers']
-                subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-                sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown Sender')
-                date = next((h['value'] for h in headers if h['name'] == 'Date'), 'Unknown Date')
+                headers = _header_map(msg['payload']['headers'])
+                subject = headers.get('subject', 'No Subject')
+                sender = headers.get('from', 'Unknown Sender')
+                date = headers.get('date', 'Unknown Date')
                 email_id = message['id']
                 
-                output.append(f"📧 {subject}\nFrom: {sender}\nDate: {date}\nID: {email_id}\n{'─' * 50}")
+                output.append(f"📧 {subject}\nFrom: {sender}\nDate: {date}\nID: {email_id}\n{RESULT_SEPARATOR}")
             
-            return {"content": [{"type": "text", "text": "\n".join(output)}]}
+            return _text("\n".join(output))
             
         except Exception as e:
-            return {"content": [{"type": "text", "text": f"Error: {str(e)}"}], "isError": True}
+            return _text(f"Error: {str(e)}", is_error=True)
 
     async def send_email(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Send an email using Gmail API"""
-        from googleapiclient.discovery import build
-        from google.oauth2.credentials import Credentials
-        import base64
-        from email.mime.text import MIMEText
-
-        to = arguments.get("to")
-        subject = arguments.get("subject")
-        body = arguments.get("body")
-        
-        if not all([to, subject, body]):
-            return {"content": [{"type": "text", "text": "Error: to, subject, and body are required"}], "isError": True}
+
+        to = arguments["to"]
+        subject = arguments["subject"]
+        body = arguments["body"]
         
         try:
-            creds = Credentials.from_authorized_user_file('/Users/amanueltefera/Desktop/untitled folder 3/token.json')
-            service = build('gmail', 'v1', credentials=creds)
-            
-            # Create message
-            message = MIMEText(body)
-            message['to'] = to
-            message['subject'] = subject
+            service = self._gmail_service()
             
-            # Encode the message
-            raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
+            # Create and encode the message
+            raw_message = base64.urlsafe_b64encode(_plain_text_message(to, subject, body)).decode('ascii')
             
             # Send the message
-            sent_message = service.users().messages().send(
+            sent_message = await self._execute(service.users().messages().send(
                 userId='me', 
                 body={'raw': raw_message}
-            ).execute()
+            ))
             
             message_id = sent_message.get('id', 'No ID')
             
-            return {"content": [{"type": "text", "text": f"✅ Email sent successfully!\nMessage ID: {message_id}"}]}
+            return _text(f"✅ Email sent successfully!\nMessage ID: {message_id}")
             
         except Exception as e:
-            return {"content": [{"type": "text", "text": f"❌ Error sending email: {str(e)}"}], "isError": True}
+            return _text(f"❌ Error sending email: {str(e)}", is_error=True)
 
     async def read_email(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Read a specific email by ID"""
-        from googleapiclient.discovery import build
-        from google.oauth2.credentials import Credentials
-        import base64
-        import email
-
-        email_id = arguments.get("emailId")
-        if not email_id:
-            return {"content": [{"type": "text", "text": "Error: Email ID is required"}], "isError": True}
+
+        email_id = arguments["emailId"]
         
         try:
-            creds = Credentials.from_authorized_user_file('/Users/amanueltefera/Desktop/untitled folder 3/token.json')
-            service = build('gmail', 'v1', credentials=creds)
+            service = self._gmail_service()
             
             # Get the message
-            message = service.users().messages().get(userId='me', id=email_id).execute()
+            message = await self._execute(service.users().messages().get(userId='me', id=email_id, format='full'))
             
             # Extract headers
-            headers = message['payload']['headers']
-            subject = next((h['value'] for h in headers if h['name'] == 'Subject'), 'No Subject')
-            sender = next((h['value'] for h in headers if h['name'] == 'From'), 'Unknown Sender')
-            date = next((h['value'] for h in headers if h['name'] == 'Date'), 'Unknown Date')
+            headers = _header_map(message['payload']['headers'])
+            subject = headers.get('subject', 'No Subject')
+            sender = headers.get('from', 'Unknown Sender')
+            date = headers.get('date', 'Unknown Date')
             
             # Extract body
-            body = ""
-            if 'parts' in message['payload']:
-                for part in message['payload']['parts']:
-                    if part['mimeType'] == 'text/plain':
-                        body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                        break
+            data = _find_text_data(message['payload'])
+            if not data:
+                body = ""
+            elif len(data) > LARGE_BODY_SIZE:
+                body = await asyncio.to_thread(_decode_body, data)
             else:
-                if message['payload']['mimeType'] == 'text/plain':
-                    body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
+                body = _decode_body(data)
             
             if not body:
                 body = "No text content found"
             
             output = f"📧 {subject}\nFrom: {sender}\nDate: {date}\nID: {email_id}\n\n{body}"
             
-            return {"content": [{"type": "text", "text": output}]}
+            return _text(output)
             
         except Exception as e:
-            return {"content": [{"type": "text", "text": f"❌ Error reading email: {str(e)}"}], "isError": True}
+            return _text(f"❌ Error reading email: {str(e)}", is_error=True)
 
     async def delete_email(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Delete a Gmail message"""
-        from googleapiclient.discovery import build
-        from google.oauth2.credentials import Credentials
-        
-        email_id = arguments.get("emailId")
-        if not email_id:
-            return {"content": [{"type": "text", "text": "Error: Email ID is required"}], "isError": True}
+        email_id = arguments["emailId"]
         
         try:
-            creds = Credentials.from_authorized_user_file('/Users/amanueltefera/Desktop/untitled folder 3/token.json')
-            service = build('gmail', 'v1', credentials=creds)
+            service = self._gmail_service()
             
             # Delete the message
-            service.users().messages().delete(userId='me', id=email_id).execute()
+            await self._execute(service.users().messages().delete(userId='me', id=email_id))
             
-            return {"content": [{"type": "text", "text": f"✅ Successfully deleted email: {email_id}"}]}
+            return _text(f"✅ Successfully deleted email: {email_id}")
             
         except Exception as e:
-            return {"content": [{"type": "text", "text": f"❌ Error deleting email: {str(e)}"}], "isError": True}
+            return _text(f"❌ Error deleting email: {str(e)}", is_error=True)
         
 
-async def main():
+# JSON-RPC method name -> handler
+_METHOD_DISPATCH = {
+    "initialize": MCPServer.handle_initialize,
+    "tools/list": MCPServer.handle_list_tools,
+    "tools/call": MCPServer.handle_call_tool,
+}
+
+# Tool name -> handler
+_TOOL_DISPATCH = {
+    "create_github_repository": MCPServer.create_github_repository,
+    "delete_github_repository": MCPServer.delete_github_repository,
+    "list_calendar_events": MCPServer.list_calendar_events,
+    "create_calendar_events": MCPServer.create_calendar_events,
+    "update_calendar_events": MCPServer.update_calendar_events,
+    "delete_calendar_events": MCPServer.delete_calendar_events,
+    "list_emails": MCPServer.list_emails,
+    "send_email": MCPServer.send_email,
+    "read_email": MCPServer.read_email,
+    "delete_email": MCPServer.delete_email,
+}
+
+async def main() -> None:
     """Main function to run the MCP server"""
     server = MCPServer()
     
-    print(f"🚀 Starting {server.server_name} MCP server...", file=sys.stderr)
-    print("Ready to receive MCP messages on stdin/stdout", file=sys.stderr)
+    # One write so the banner can't interleave with other stderr output
+    os.write(sys.stderr.fileno(), f"🚀 Starting {server.server_name} MCP server...\n"
+                                  "Ready to receive MCP messages on stdin/stdout\n".encode())
     
-    # Read from stdin, write to stdout
+    # asyncio.to_thread would otherwise size its pool by CPU count
+    asyncio.get_running_loop().set_default_executor(concurrent.futures.ThreadPoolExecutor(
+        max_workers=MAX_WORKER_THREADS, thread_name_prefix="mcp-worker"
+    ))
+    
+    try:
+        await serve(server)
+    finally:
+        await server.aclose()
+
+class _StdoutProtocol(asyncio.streams.FlowControlMixin):
+    """Write-pipe protocol for stdout that StreamWriter.wait_closed() can wait on"""
+    def __init__(self) -> None:
+        super().__init__()
+        self._closed = asyncio.get_running_loop().create_future()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        super().connection_lost(exc)
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def _get_close_waiter(self, stream: asyncio.StreamWriter) -> "asyncio.Future[None]":
+        return self._closed
+
+class _FileWriter:
+    """StreamWriter stand-in for when stdout is redirected to a regular file"""
+    __slots__ = ("_fd",)
+
+    def __init__(self, fd: int) -> None:
+        self._fd = fd
+
+    def write(self, data: bytes) -> None:
+        # Straight to the file descriptor, regular files never block the loop for long
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+
+    def writelines(self, data: Iterable[bytes]) -> None:
+        self.write(b"".join(data))
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    async def wait_closed(self) -> None:
+        pass
+
+async def _feed_from_file(loop: asyncio.AbstractEventLoop, reader: asyncio.StreamReader, file: io.BufferedReader) -> None:
+    """Feed a StreamReader from a regular file, which the event loop can't watch"""
     while True:
+        data = await loop.run_in_executor(None, file.read1, READ_CHUNK_SIZE)
+        if not data:
+            reader.feed_eof()
+            return
+        reader.feed_data(data)
+
+def _is_pollable(fd: int) -> bool:
+    """Check whether the event loop can watch a file descriptor"""
+    # Other char devices like /dev/null are accepted by connect_read_pipe but
+    # can't be registered with epoll, so only pipes, sockets and TTYs qualify
+    mode = os.fstat(fd).st_mode
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or os.isatty(fd)
+
+async def _open_stdio(
+    loop: asyncio.AbstractEventLoop
+) -> Tuple[asyncio.StreamReader, Union[asyncio.StreamWriter, _FileWriter], Optional["asyncio.Task[None]"]]:
+    """Attach non-blocking streams to stdin and stdout"""
+    reader = asyncio.StreamReader(limit=STDIN_LIMIT)
+    feeder: Optional["asyncio.Task[None]"] = None
+    if _is_pollable(sys.stdin.fileno()):
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    else:
+        # stdin is a regular file or device (e.g. `< requests.jsonl`)
+        feeder = asyncio.create_task(_feed_from_file(loop, reader, cast(io.BufferedReader, sys.stdin.buffer)))
+    
+    writer: Union[asyncio.StreamWriter, _FileWriter]
+    if _is_pollable(sys.stdout.fileno()):
+        transport, protocol = await loop.connect_write_pipe(_StdoutProtocol, sys.stdout)
+        writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    else:
+        # stdout is a regular file or device (e.g. `> responses.jsonl`)
+        writer = _FileWriter(sys.stdout.fileno())
+    
+    return reader, writer, feeder
+
+class _Responder:
+    """Handles decoded stdin lines and writes their responses to stdout"""
+    __slots__ = ("_loop", "_writer", "_handle_message", "_frames", "_slots", "pending")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, writer: Union[asyncio.StreamWriter, _FileWriter],
+                 server: MCPServer) -> None:
+        self._loop = loop
+        self._writer = writer
+        self._handle_message = server.handle_message
+        # Responses produced in the same loop iteration go out in a single write
+        self._frames: List[bytes] = []
+        # Handle tool calls in their own tasks so slow ones don't block reading,
+        # and stop reading once MAX_CONCURRENT_REQUESTS are in flight
+        self._slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.pending: Set["asyncio.Task[None]"] = set()
+
+    def flush_frames(self) -> None:
+        if self._frames:
+            self._writer.writelines(self._frames)
+            self._frames.clear()
+
+    async def write_frame(self, frame: bytes) -> None:
+        if not self._frames:
+            self._loop.call_soon(self.flush_frames)
+        self._frames.append(frame)
+        await self._writer.drain()
+
+    async def respond(self, message: Any) -> None:
         try:
-            # Read a line from stdin
-            line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
-            if not line:
-                break
-            
-            # Parse the JSON message
-            message = json.loads(line.strip())
-            
             # Handle the message
-            response = await server.handle_message(message)
-            
-            # Send the response
-            print(json.dumps(response), flush=True)
-            
-        except json.JSONDecodeError as e:
-            print(json.dumps({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32700,
-                    "message": f"Parse error: {str(e)}"
-                }
-            }), flush=True)
+            response = await self._handle_message(message)
+            # Encoded inline: the JSON encoders are a single call holding the GIL,
+            # so a worker thread wouldn't let the loop run in the meantime
+            frame = _dumps(response) + b"\n"
         except Exception as e:
-            print(json.dumps({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32603,
-                    "message": f"Internal error: {str(e)}"
-                }
-            }), flush=True)
+            msg_id = message.get("id") if isinstance(message, dict) else None
+            frame = _internal_error_frame(msg_id, str(e))
+        
+        # Send the response
+        await self.write_frame(frame)
+
+    async def respond_bounded(self, message: Any) -> None:
+        try:
+            await self.respond(message)
+        finally:
+            self._slots.release()
+
+    async def dispatch(self, line: Union[bytearray, memoryview]) -> None:
+        try:
+            # Parse the JSON message
+            message = _loads(line)
+        except _JSONDecodeError as e:
+            await self.write_frame(_parse_error_frame(str(e)))
+            return
+        
+        method = message.get("method") if isinstance(message, dict) else None
+        if isinstance(method, str) and method in INLINE_METHODS:
+            if method == "tools/list":
+                # Reuse the serialized tool list instead of encoding it again
+                await self.write_frame(_tools_list_response(message.get("id")))
+            else:
+                await self.respond(message)
+            return
+        
+        await self._slots.acquire()
+        task = asyncio.create_task(self.respond_bounded(message))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+async def serve(server: MCPServer) -> None:
+    """Read MCP messages from stdin and write responses to stdout"""
+    # Looked up once and shared by the stdio setup and the read loop
+    loop = asyncio.get_running_loop()
+    reader, writer, feeder = await _open_stdio(loop)
+    
+    responder = _Responder(loop, writer, server)
+    dispatch = responder.dispatch
+    
+    buffer = bytearray()
+    discarding: bool = False
+    while True:
+        # Read whatever stdin has available and handle every complete line in it
+        data = await reader.read(READ_CHUNK_SIZE)
+        if not data:
+            break
+        
+        # Only the newly read bytes can contain the next newline
+        start = 0
+        scan = len(buffer)
+        buffer += data
+        # Lines are decoded straight out of the buffer through memoryviews, which
+        # must all be released before the consumed bytes are deleted below.
+        # A trailing \r from CRLF framing is plain JSON whitespace.
+        with memoryview(buffer) as view:
+            while (end := buffer.find(b"\n", scan)) >= 0:
+                line_start = start
+                start = scan = end + 1
+                if discarding:
+                    # Tail of a message that was too long, already answered
+                    discarding = False
+                    continue
+                with view[line_start:end] as line:
+                    await dispatch(line)
+        del buffer[:start]
+        
+        if len(buffer) > STDIN_LIMIT:
+            # Answer an oversized message once, then drop the rest of it
+            if not discarding:
+                await responder.write_frame(_OVERSIZED_MESSAGE_FRAME)
+                discarding = True
+            buffer.clear()
+    
+    # A final message without a trailing newline
+    if buffer and not discarding:
+        await dispatch(buffer)
+    
+    # Finish in-flight requests and flush stdout before exiting
+    if feeder is not None:
+        await feeder
+    if responder.pending:
+        await asyncio.gather(*responder.pending)
+    responder.flush_frames()
+    writer.close()
+    await writer.wait_closed()
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    if uvloop is not None and hasattr(uvloop, "run"):
+        uvloop.run(main())
+    else:
+        if uvloop is not None:  # uvloop < 0.18 has no run()
+            uvloop.install()
+        asyncio.run(main()) 
\ No newline at end of file